@@ -0,0 +1,157 @@
+import argparse
+import random
+import re
+import sys
+import time
+
+from generate_latex import (
+    CLEAN_RULES,
+    MATH_CLOSE,
+    MATH_OPEN,
+    MATH_SYMBOLS,
+    TEXT_SYMBOLS,
+    RuleTimeout,
+    clean_text,
+    transliterate,
+)
+
+# Property and fuzz harness for the clean_text rules.
+#
+# 1. Growth check: every rule (and transliterate) is timed on adversarial
+#    inputs of size n and GROWTH_FACTOR * n. A linear rule grows by about
+#    GROWTH_FACTOR; anything well above that is reported as super-linear.
+# 2. Fuzzing: random documents built from extraction debris are run through
+#    clean_text under a time budget and checked for output properties.
+#
+# Exits non-zero when a rule is super-linear, blows the budget or breaks
+# a property.
+
+GROWTH_FACTOR = 4
+# Allowed slowdown beyond linear growth before a rule is flagged
+GROWTH_TOLERANCE = 2.5
+
+GLYPHS = ['\uf8eb', '\uf8ed', '\uf8f6', '\uf8f8', '\uf8ee', '\uf8f0', '\uf8f9', '\uf8fb',
+          '\x0c', '\x12', '\x13', '\\']
+
+# Adversarial input families, each a function of the target size.
+# They aim at long whitespace runs after anchors, unterminated pairs and
+# repeated prefixes that make a backtracking engine rescan the same text.
+ADVERSARIAL = {
+    'blank-run': lambda n: ' ' * n,
+    'newline-run': lambda n: '\n' * n,
+    'digit-lines': lambda n: '1 \n' * (n // 3),
+    'digits-then-text': lambda n: '7' * n + 'x',
+    'unterminated-end-marker': lambda n: '--- END OF x' * (n // 12),
+    'unterminated-start-marker': lambda n: '--- START OF x' * (n // 14),
+    'let-whitespace': lambda n: 'Let' + ' ' * n + '1',
+    'let-repeated': lambda n: 'Let ' * (n // 4),
+    'glyph-whitespace': lambda n: ''.join(g + ' ' * 64 + '\\' + ' ' * 64 + 'x' for g in GLYPHS[:8]) * (n // 1100 + 1),
+    'glyph-blank-tail': lambda n: '\uf8eb' + ' ' * n + 'x',
+    'glyph-backslash-tail': lambda n: '\uf8f6' + ' \\ ' * (n // 3),
+    'unclosed-big-parens': lambda n: '\x12' + 'a' * n,
+    'repeated-big-parens': lambda n: '\x12a' * (n // 2),
+    'bar-runs': lambda n: ('\x0c' * 8 + 'a' * 8) * (n // 16),
+    'unclosed-bars': lambda n: '\x0c' * (n // 2) + 'a' * (n // 2),
+    'symbol-soup': lambda n: ''.join(random.Random(n).choice(list(MATH_SYMBOLS)) for _ in range(n)),
+    'accent-runs': lambda n: '˜ ' * (n // 2),
+    'negation-runs': lambda n: '\u0338' * n + '=',
+}
+
+# A control word run into following text, e.g. "\leftarrowR_2", is an undefined macro
+GLUED_CONTROL_WORD = re.compile(r'\\[A-Za-z]+R_')
+
+RULES = [(name, (lambda text, pattern=pattern, repl=repl: pattern.sub(repl, text)))
+         for name, pattern, repl in CLEAN_RULES]
+RULES.append(('transliterate', transliterate))
+
+ALPHABET = (list(MATH_SYMBOLS) + list(TEXT_SYMBOLS) + GLYPHS +
+            [' ', '\n', '\t', 'Let', 'LetA=', '=', 'Problem 1.1.', 'R2', 'R3←', 'R1−', '0', '9', 'x', 'A', '²', '₁'])
+
+
+def best_time(func, text, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_growth(size):
+    failures = []
+    for family, make in ADVERSARIAL.items():
+        small, large = make(size), make(size * GROWTH_FACTOR)
+        for name, func in RULES:
+            t_small = best_time(func, small)
+            t_large = best_time(func, large)
+            # Ignore timings too small to be meaningful
+            if t_large < 1e-3:
+                continue
+            ratio = t_large / max(t_small, 1e-6)
+            if ratio > GROWTH_FACTOR * GROWTH_TOLERANCE:
+                failures.append(f"{name} on {family}: x{ratio:.1f} time for x{GROWTH_FACTOR} input "
+                                f"({t_small * 1000:.2f} ms -> {t_large * 1000:.2f} ms)")
+    return failures
+
+
+def check_properties(output):
+    problems = []
+    if MATH_OPEN in output or MATH_CLOSE in output:
+        problems.append("math sentinel leaked into output")
+    leftovers = sorted({ch for ch in output if ch in TEXT_SYMBOLS or ch in MATH_SYMBOLS})
+    if leftovers:
+        problems.append(f"untransliterated symbols {leftovers!r}")
+    # Escaped braces come from brace glyphs and are not groups
+    if output.count('{') - output.count(r'\{') != output.count('}') - output.count(r'\}'):
+        problems.append("unbalanced braces")
+    glued = GLUED_CONTROL_WORD.search(output)
+    if glued:
+        problems.append(f"control word glued to following text {glued.group(0)!r}")
+    if output != output.strip():
+        problems.append("output not stripped")
+    return problems
+
+
+def fuzz(iterations, size, budget, seed):
+    rng = random.Random(seed)
+    failures = []
+    for i in range(iterations):
+        text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, size)))
+        try:
+            output = clean_text(text, budget)
+        except RuleTimeout as e:
+            failures.append(f"case {i}: {e}")
+            continue
+        failures.extend(f"case {i}: {p}" for p in check_properties(output))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check clean_text rules for super-linear behaviour.")
+    parser.add_argument('--size', type=int, default=20000, help="Base size of adversarial inputs")
+    parser.add_argument('--iterations', type=int, default=500, help="Number of random fuzz documents")
+    parser.add_argument('--fuzz-size', type=int, default=2000, help="Maximum tokens per fuzz document")
+    parser.add_argument('--budget', type=float, default=1.0, help="Per-document time budget in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    failures = check_growth(args.size)
+
+    # Every adversarial document must also clear the budget end to end
+    for family, make in ADVERSARIAL.items():
+        try:
+            clean_text(make(args.size * GROWTH_FACTOR), args.budget)
+        except RuleTimeout as e:
+            failures.append(f"{family}: {e}")
+
+    failures += fuzz(args.iterations, args.fuzz_size, args.budget, args.seed)
+
+    for failure in failures:
+        print(failure)
+    print(f"{len(RULES)} rules, {len(ADVERSARIAL)} adversarial families, "
+          f"{args.iterations} fuzz cases: {len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,15 @@
+import argparse
+import contextlib
+import heapq
+import io
+import json
+import os
 import re
+import signal
+import sys
+import tempfile
+import threading
+import time
 
 PREAMBLE = r"""\documentclass[11pt,a4paper]{article}
 \usepackage[utf8]{inputenc}
@@ -66,78 +77,355 @@ PREAMBLE = r"""\documentclass[11pt,a4paper]{article}
 \newpage
 """
 
-def clean_text(text):
-    # Remove page numbers and other artifacts
-    text = re.sub(r'^\d+\s*$', '', text, flags=re.MULTILINE)
-    text = text.replace("--- END OF MFML_Practice_Questions_Final.pdf ---", "")
-    # Fix common extraction errors like "LetA=" to "Let A ="
-    text = re.sub(r'LetA=', 'Let $A=', text)
-    text = re.sub(r'Let\s*([A-Za-z])=', r'Let $\1=', text)
-    text = re.sub(r'([A-Za-z0-9])=\\begin', r'\1= \\begin', text)
+# Unicode -> LaTeX transliteration for extracted PDF text.
+# Symbols that need math mode are wrapped in \ensuremath so they are valid
+# both in running text and inside the (partially) math-mode extracted formulas.
+# Everything is applied with str.translate, so the cost is linear in the text
+# and independent of the table size.
+
+MATH_SYMBOLS = {
+    # Greek
+    'α': r'\alpha', 'β': r'\beta', 'γ': r'\gamma', 'δ': r'\delta',
+    'ε': r'\varepsilon', 'ϵ': r'\epsilon', 'ζ': r'\zeta', 'η': r'\eta',
+    'θ': r'\theta', 'ϑ': r'\vartheta', 'ι': r'\iota', 'κ': r'\kappa',
+    'λ': r'\lambda', 'μ': r'\mu', 'ν': r'\nu', 'ξ': r'\xi', 'π': r'\pi',
+    'ρ': r'\rho', 'ϱ': r'\varrho', 'σ': r'\sigma', 'ς': r'\varsigma',
+    'τ': r'\tau', 'υ': r'\upsilon', 'φ': r'\varphi', 'ϕ': r'\phi',
+    'χ': r'\chi', 'ψ': r'\psi', 'ω': r'\omega',
+    'Γ': r'\Gamma', 'Δ': r'\Delta', 'Θ': r'\Theta', 'Λ': r'\Lambda',
+    'Ξ': r'\Xi', 'Π': r'\Pi', 'Σ': r'\Sigma', 'Υ': r'\Upsilon',
+    'Φ': r'\Phi', 'Ψ': r'\Psi', 'Ω': r'\Omega',
+    # Operators
+    '−': '-', '±': r'\pm', '∓': r'\mp', '×': r'\times', '÷': r'\div',
+    '·': r'\cdot', '∗': r'\ast', '∘': r'\circ', '⊗': r'\otimes',
+    '⊕': r'\oplus', '√': r'\surd', '∞': r'\infty', '∂': r'\partial',
+    '∇': r'\nabla', '∑': r'\sum', '∏': r'\prod', '∫': r'\int',
+    '′': "'", '″': "''",
+    # Relations
+    '≤': r'\leq', '≥': r'\geq', '≠': r'\neq', '≈': r'\approx',
+    '≡': r'\equiv', '≢': r'\not\equiv', '∼': r'\sim', '≁': r'\nsim',
+    '≃': r'\simeq', '∝': r'\propto', '≪': r'\ll', '≫': r'\gg',
+    '≮': r'\nless', '≯': r'\ngtr', '≰': r'\nleq', '≱': r'\ngeq',
+    '∈': r'\in', '∉': r'\notin', '∋': r'\ni',
+    '⊂': r'\subset', '⊆': r'\subseteq', '⊃': r'\supset', '⊇': r'\supseteq',
+    '⊄': r'\not\subset', '⊈': r'\nsubseteq',
+    '∪': r'\cup', '∩': r'\cap', '∅': r'\emptyset',
+    '∀': r'\forall', '∃': r'\exists', '¬': r'\neg', '∧': r'\wedge', '∨': r'\vee',
+    '⊥': r'\perp', '∥': r'\|', '∣': r'\mid',
+    # Arrows
+    '←': r'\leftarrow', '→': r'\rightarrow', '↔': r'\leftrightarrow',
+    '⇐': r'\Leftarrow', '⇒': r'\Rightarrow', '⇔': r'\Leftrightarrow',
+    '↦': r'\mapsto', '↑': r'\uparrow', '↓': r'\downarrow',
+    # Delimiters and sets
+    '⟨': r'\langle', '⟩': r'\rangle', '⌊': r'\lfloor', '⌋': r'\rfloor',
+    '⌈': r'\lceil', '⌉': r'\rceil',
+    'ℝ': r'\mathbb{R}', 'ℕ': r'\mathbb{N}', 'ℤ': r'\mathbb{Z}',
+    'ℚ': r'\mathbb{Q}', 'ℂ': r'\mathbb{C}',
+    '⋯': r'\cdots', '⋮': r'\vdots', '⋱': r'\ddots',
+}
 
-    # Fix matrix formatting from extraction
-    text = re.sub(r'\s*\\?\s*', r'\\begin{pmatrix}', text)
-    text = re.sub(r'\s*\\?\s*', r'\\end{pmatrix}', text)
-    text = re.sub(r'R2←', r'R_2 \\leftarrow ', text)
-    text = re.sub(r'R3←', r'R_3 \\leftarrow ', text)
-    text = re.sub(r'R1−', r'R_1 - ', text)
+TEXT_SYMBOLS = {
+    '‘': '`', '’': "'", '“': '``', '”': "''", '–': '--', '—': '---',
+    '•': r'\textbullet{}', '…': r'\ldots{}', '\xa0': '~', 'ﬁ': 'fi', 'ﬂ': 'fl',
+    # Spacing accents left over when no base letter follows
+    '˜': r'\~{}', 'ˆ': r'\^{}', '¯': r'\={}',
+    # Stray combining overlay (negation handled in context stage)
+    '\u0338': '',
+    # Extensible delimiter pieces: cmex control slots and the private-use
+    # area glyphs PDF extractors emit for tall parentheses/brackets/braces.
+    # Paired pieces are turned into matrices by clean_text; leftovers keep
+    # only their top piece.
+    '\x00': '(', '\x01': ')', '\x10': '(', '\x11': ')', '\x12': '(', '\x13': ')',
+    '\x0c': '|',
+    '\uf8eb': '(', '\uf8ec': '', '\uf8ed': '',
+    '\uf8f6': ')', '\uf8f7': '', '\uf8f8': '',
+    '\uf8ee': '[', '\uf8ef': '', '\uf8f0': '',
+    '\uf8f9': ']', '\uf8fa': '', '\uf8fb': '',
+    '\uf8f1': r'\{', '\uf8f2': '', '\uf8f3': '', '\uf8f4': '',
+    '\uf8fc': r'\}', '\uf8fd': '', '\uf8fe': '',
+}
 
-    return text.strip()
+SUPERSCRIPTS = {
+    '⁰': '0', '¹': '1', '²': '2', '³': '3', '⁴': '4', '⁵': '5', '⁶': '6',
+    '⁷': '7', '⁸': '8', '⁹': '9', '⁺': '+', '⁻': '-', '⁼': '=', '⁽': '(',
+    '⁾': ')', 'ⁱ': 'i', 'ⁿ': 'n', 'ᵀ': 'T',
+}
 
-def parse_existing_questions(filename):
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Split by "Problem X.Y."
-    # We look for patterns like "Problem 1.1."
-    problems = []
-
-    # Regex to find problem starts
-    # It seems the text has "Problem 1.1." then text.
-    pattern = re.compile(r'(Problem\s+\d+\.\d+\.)')
-    parts = pattern.split(content)
-
-    current_section = "General"
-
-    # Map from section number to section name based on the file content
-    section_map = {
-        '1': "Linear Algebra Fundamentals",
-        '2': "Principal Component Analysis (PCA)",
-        '3': "Optimization (Unconstrained)",
-        '4': "Optimization (Constrained)",
-        '5': "Support Vector Machines (SVM)",
-        '6': "Minimization and Maximization using Matrices"
-    }
+SUBSCRIPTS = {
+    '₀': '0', '₁': '1', '₂': '2', '₃': '3', '₄': '4', '₅': '5', '₆': '6',
+    '₇': '7', '₈': '8', '₉': '9', '₊': '+', '₋': '-', '₌': '=', '₍': '(',
+    '₎': ')', 'ₐ': 'a', 'ₑ': 'e', 'ᵢ': 'i', 'ⱼ': 'j', 'ₖ': 'k', 'ₙ': 'n',
+    'ₒ': 'o', 'ₓ': 'x',
+}
 
-    # Skip the intro part before the first problem
+# Overlay negation (U+0338) is extracted *before* the relation it strikes.
+NEGATIONS = {
+    '=': '≠', '∈': '∉', '⊂': '⊄', '⊆': '⊈', '∼': '≁', '≡': '≢',
+    '<': '≮', '>': '≯', '≤': '≰', '≥': '≱',
+}
 
-    for i in range(1, len(parts), 2):
-        header = parts[i] # "Problem 1.1."
-        body = parts[i+1] if i+1 < len(parts) else ""
+ACCENTS = {
+    '˜': 'tilde', 'ˆ': 'hat', '¯': 'bar',
+    '\u0302': 'hat', '\u0303': 'tilde', '\u0304': 'bar', '\u0307': 'dot',
+    '\u0308': 'ddot', '\u20d7': 'vec',
+}
 
-        # Determine section from the problem number "1.1" -> section 1
-        problem_num = header.split()[1] # "1.1."
-        section_num = problem_num.split('.')[0]
-        section_name = section_map.get(section_num, "General")
+# Noncharacters used to delimit math runs until they are merged and emitted.
+MATH_OPEN, MATH_CLOSE = '\ufdd0', '\ufdd1'
+
+def _math(latex):
+    return MATH_OPEN + latex + MATH_CLOSE
+
+UNICODE_TO_LATEX = str.maketrans({
+    **TEXT_SYMBOLS,
+    **{ch: _math(latex) for ch, latex in MATH_SYMBOLS.items()},
+})
+_SUPERSCRIPT_TABLE = str.maketrans(SUPERSCRIPTS)
+_SUBSCRIPT_TABLE = str.maketrans(SUBSCRIPTS)
+_MATH_DELIMITERS = str.maketrans({MATH_OPEN: r'\ensuremath{', MATH_CLOSE: '}'})
+
+def _char_class(chars):
+    return '[' + ''.join(re.escape(ch) for ch in chars) + ']'
+
+_NEGATION_RE = re.compile('\u0338(' + _char_class(NEGATIONS) + ')')
+_SPACING_ACCENT_RE = re.compile('(' + _char_class('˜ˆ¯') + ') ?([A-Za-z])')
+_COMBINING_ACCENT_RE = re.compile('([A-Za-z])(' + _char_class('\u0302\u0303\u0304\u0307\u0308\u20d7') + ')')
+_SUPERSCRIPT_RE = re.compile(_char_class(SUPERSCRIPTS) + '+')
+_SUBSCRIPT_RE = re.compile(_char_class(SUBSCRIPTS) + '+')
+_ROW_OPERATION_RE = re.compile(r'R(\d)([←−])')
+
+def transliterate(text):
+    # Context-aware stage: constructs whose LaTeX depends on neighbouring characters.
+    text = _NEGATION_RE.sub(lambda m: NEGATIONS[m.group(1)], text)
+    text = _SPACING_ACCENT_RE.sub(lambda m: _math(f"\\{ACCENTS[m.group(1)]}{{{m.group(2)}}}"), text)
+    text = _COMBINING_ACCENT_RE.sub(lambda m: _math(f"\\{ACCENTS[m.group(2)]}{{{m.group(1)}}}"), text)
+    text = _SUPERSCRIPT_RE.sub(lambda m: _math('^{' + m.group(0).translate(_SUPERSCRIPT_TABLE) + '}'), text)
+    text = _SUBSCRIPT_RE.sub(lambda m: _math('_{' + m.group(0).translate(_SUBSCRIPT_TABLE) + '}'), text)
+    # Row operations such as "R2←R2−2R1"
+    text = _ROW_OPERATION_RE.sub(lambda m: _math(f"R_{m.group(1)}") + m.group(2), text)
+
+    # Single table-driven pass over every remaining symbol
+    text = text.translate(UNICODE_TO_LATEX)
+
+    # Merge adjacent math runs into one \ensuremath group, then emit delimiters.
+    # The space keeps a trailing control word ("\lambda") off the next run.
+    return text.replace(MATH_CLOSE + MATH_OPEN, ' ').translate(_MATH_DELIMITERS)
+
+class RuleTimeout(Exception):
+    """Raised when clean_text exceeds its time budget on a document."""
+
+    def __init__(self, rule, budget):
+        super().__init__(f"clean_text rule '{rule}' exceeded the {budget:g}s budget")
+        self.rule = rule
+        self.budget = budget
+        self.document = None
+
+    def __str__(self):
+        message = super().__str__()
+        return f"{self.document}: {message}" if self.document else message
+
+def _glyph_pair(top, bottom):
+    # The optional backslash sits between two whitespace runs; grouping it
+    # with the second run keeps the split unambiguous (`\s*\\?\s*` is
+    # quadratic on long blank runs).
+    return top + r'\s*(?:\\\s*)?' + bottom
+
+def _delimited(opening, closing, stops):
+    # Content may not contain the `stops` glyphs, so every scan ends at the
+    # next opening or closing piece and the pattern stays linear.
+    return re.compile(opening + '([^' + stops + ']*)' + closing)
+
+# Whitespace between matrix entries; spaces around a binary operator
+# ("2(2) + 2(1)") stay inside the entry, a leading sign ("1 -6") does not.
+_MATRIX_CELL_GAP = re.compile(r'(?<![+\-−=×·])\s+(?![+\-−=×·]\s)')
+
+def _matrix(env):
+    # Extracted matrices keep one row per line and blank-separated entries
+    def replace(m):
+        rows = [' & '.join(_MATRIX_CELL_GAP.split(row.strip()))
+                for row in m.group(1).split('\n') if row.strip()]
+        return _math(f"\\begin{{{env}}}" + r' \\ '.join(rows) + f"\\end{{{env}}}")
+    return replace
+
+# Rules applied in order by clean_text, as (name, pattern, replacement).
+# Every pattern must run in linear time on any input: each repetition is
+# anchored by a literal or a lookbehind, and no two adjacent repetitions
+# can match the same characters.
+# `python fuzz_clean_text.py` checks this against adversarial inputs.
+CLEAN_RULES = [
+    # Remove page numbers and other artifacts
+    ('page-number', re.compile(r'^\d+\s*$', re.MULTILINE), ''),
+    ('end-marker', re.compile(r'^--- END OF [^\n]* ---$', re.MULTILINE), ''),
+    # Concatenated extracts put the next file's marker inside the last problem
+    ('start-marker', re.compile(r'^--- START OF [^\n]* ---$', re.MULTILINE), ''),
+    # Fix common extraction errors like "LetA=" to "Let A ="
+    ('let-a', re.compile(r'LetA='), 'Let $A='),
+    ('let-variable', re.compile(r'Let\s*([A-Za-z])='), r'Let $\1='),
+    ('equals-begin', re.compile(r'([A-Za-z0-9])=\\begin'), r'\1= \\begin'),
+    # Fix matrix formatting from extraction. Only paired delimiters become
+    # matrices; unpaired pieces fall back to plain brackets in transliterate.
+    ('pmatrix', _delimited(_glyph_pair('\uf8eb', '\uf8ed'), _glyph_pair('\uf8f6', '\uf8f8'), '\uf8eb\uf8f6'),
+     _matrix('pmatrix')),
+    ('bmatrix', _delimited(_glyph_pair('\uf8ee', '\uf8f0'), _glyph_pair('\uf8f9', '\uf8fb'), '\uf8ee\uf8f9'),
+     _matrix('bmatrix')),
+    ('big-parens', _delimited('\x12', '\x13', '\x12\x13'), _matrix('pmatrix')),
+    ('vertical-bars', _delimited(r'(?<!\x0c)\x0c+', r'\x0c+', '\x0c'), _matrix('vmatrix')),
+]
 
-        # Split body into Question and Solution
-        # Look for "Solution."
-        sol_split = body.split('Solution.', 1)
-        question_text = sol_split[0].strip()
-        solution_text = sol_split[1].strip() if len(sol_split) > 1 else ""
+class _RuleTracker:
+    # Records the rule in progress so a timeout can name it
+    def __init__(self, budget):
+        self.budget = budget
+        self.rule = None
+        self.deadline = None
+        self.running = False
+
+    def check(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise RuleTimeout(self.rule, self.budget)
+
+def _apply_rules(text, tracker):
+    for name, pattern, repl in CLEAN_RULES:
+        tracker.rule = name
+        text = pattern.sub(repl, text)
+        tracker.check()
+
+    # Unicode symbols, superscripts and PDF glyphs to LaTeX
+    tracker.rule = 'transliterate'
+    text = transliterate(text)
+    tracker.check()
 
-        # Clean up text for LaTeX
-        question_text = clean_text(question_text)
-        solution_text = clean_text(solution_text)
+    return text.strip()
 
-        problems.append({
-            'section': section_name,
-            'header': header.strip(), # "Problem 1.1."
-            'question': question_text,
-            'solution': solution_text
-        })
+@contextlib.contextmanager
+def time_budget(budget):
+    # Runs the clean_text rules applied with the yielded tracker under one
+    # budget (seconds); overrunning raises RuleTimeout naming the rule.
+    tracker = _RuleTracker(budget)
+    if budget is None:
+        yield tracker
+        return
+
+    if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        # No interval timer available: check the budget between rules instead
+        tracker.deadline = time.monotonic() + budget
+        yield tracker
+        return
+
+    def on_timeout(signum, frame):
+        # A late alarm after the rules finished must not discard the result
+        if tracker.running:
+            raise RuleTimeout(tracker.rule, budget)
+
+    # The regex engine polls for signals, so the alarm interrupts a running match
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    tracker.running = True
+    signal.setitimer(signal.ITIMER_REAL, budget)
+    try:
+        yield tracker
+    finally:
+        tracker.running = False
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def clean_text(text, budget=None):
+    # With a budget (seconds) a malformed document raises RuleTimeout naming
+    # the rule that was running, instead of stalling the build.
+    with time_budget(budget) as tracker:
+        return _apply_rules(text, tracker)
+
+# Regex to find problem starts
+# It seems the text has "Problem 1.1." then text.
+# The gap after "Problem" is capped so a streamed header prefix stays short.
+HEADER_GAP = 16
+PROBLEM_HEADER = re.compile(r'(Problem\s{1,%d}\d+\.\d+\.)' % HEADER_GAP)
+# Trailing text that may still become a header once the next line arrives.
+# Only the gap can wrap: the number itself never contains a line break.
+_PARTIAL_HEADER = re.compile(r'Problem\s{0,%d}\Z' % HEADER_GAP)
+_START_MARKER = re.compile(r'--- START OF [^\n]* ---$')
+
+# Map from section number to section name based on the file content
+SECTION_MAP = {
+    '1': "Linear Algebra Fundamentals",
+    '2': "Principal Component Analysis (PCA)",
+    '3': "Optimization (Unconstrained)",
+    '4': "Optimization (Constrained)",
+    '5': "Support Vector Machines (SVM)",
+    '6': "Minimization and Maximization using Matrices"
+}
 
-    return problems
+def split_problems(lines):
+    # Streaming equivalent of PROBLEM_HEADER.split() on the whole file:
+    # yields (header, body, line number) while holding only the current
+    # problem in memory. The intro before the first problem is skipped, as is
+    # the intro after every "--- START OF ... ---" line.
+    header, body, header_line = None, [], 0
+    pending = ''
+    for lineno, line in enumerate(lines, 1):
+        if _START_MARKER.match(line):
+            # A concatenated extract begins: close the current problem and
+            # skip the new file's intro like the first one
+            if header is not None:
+                body.append(pending)
+                yield header, ''.join(body), header_line
+            header, body, pending = None, [], ''
+            continue
+
+        text = pending + line
+        pending = ''
+        pos = 0
+        for m in PROBLEM_HEADER.finditer(text):
+            if header is not None:
+                body.append(text[pos:m.start()])
+                yield header, ''.join(body), header_line
+            header, body, header_line, pos = m.group(1), [], lineno, m.end()
+
+        # A header may continue onto the next line ("Problem\n1.1."); only
+        # that short prefix is carried over and rescanned with the next line.
+        rest = text[pos:]
+        partial = _PARTIAL_HEADER.search(rest)
+        if partial:
+            rest, pending = rest[:partial.start()], rest[partial.start():]
+        if header is not None:
+            body.append(rest)
+
+    if header is not None:
+        body.append(pending)
+        yield header, ''.join(body), header_line
+
+def iter_problems(filename, budget=None):
+    with open(filename, 'r', encoding='utf-8') as f:
+        for header, body, line in split_problems(f):
+            # Determine section from the problem number "1.1" -> section 1
+            problem_num = header.split()[1] # "1.1."
+            section_num = problem_num.split('.')[0]
+            section_name = SECTION_MAP.get(section_num, "General")
+
+            # Split body into Question and Solution
+            # Look for "Solution."
+            sol_split = body.split('Solution.', 1)
+            question_text = sol_split[0].strip()
+            solution_text = sol_split[1].strip() if len(sol_split) > 1 else ""
+
+            # Clean up text for LaTeX; question and solution share one budget
+            try:
+                with time_budget(budget) as tracker:
+                    question_text = _apply_rules(question_text, tracker)
+                    solution_text = _apply_rules(solution_text, tracker)
+            except RuleTimeout as e:
+                e.document = f"{filename}: {header.strip()}"
+                raise
+
+            yield {
+                'section': section_name,
+                'header': header.strip(), # "Problem 1.1."
+                'question': question_text,
+                'solution': solution_text,
+                'provenance': f"{filename}:{line}",
+            }
+
+def parse_existing_questions(filename, budget=None):
+    return list(iter_problems(filename, budget))
 
 NEW_QUESTIONS_L1_8 = [
     {
@@ -666,18 +954,22 @@ $\lambda_i^* g_i(x^*) = 0$. (Either the constraint is active ($g_i=0$) or the mu
     }
 ]
 
-def generate_latex(existing_problems):
-    output = PREAMBLE
+# Problems authored in this module, by the name recorded as their provenance
+AUTHORED_QUESTIONS = {
+    'NEW_QUESTIONS_L1_8': NEW_QUESTIONS_L1_8,
+    'NEW_QUESTIONS_L9_16': NEW_QUESTIONS_L9_16,
+}
 
-    sections = [
-        "Linear Algebra Fundamentals",
-        "Principal Component Analysis (PCA)",
-        "Optimization (Unconstrained)",
-        "Optimization (Constrained)",
-        "Support Vector Machines (SVM)",
-        "Minimization and Maximization using Matrices"
-    ]
+SECTIONS = [
+    "Linear Algebra Fundamentals",
+    "Principal Component Analysis (PCA)",
+    "Optimization (Unconstrained)",
+    "Optimization (Constrained)",
+    "Support Vector Machines (SVM)",
+    "Minimization and Maximization using Matrices"
+]
 
+def group_problems(existing_problems):
     # Merge existing and new problems
     all_problems = []
 
@@ -687,14 +979,16 @@ def generate_latex(existing_problems):
         all_problems.append(p)
 
     # Add new
-    for p in NEW_QUESTIONS_L1_8 + NEW_QUESTIONS_L9_16:
-        p['source'] = 'new'
-        # Assign a generic header for new problems temporarily
-        p['header'] = "Problem New"
-        all_problems.append(p)
+    for name, questions in AUTHORED_QUESTIONS.items():
+        for p in questions:
+            p['source'] = 'new'
+            # Assign a generic header for new problems temporarily
+            p['header'] = "Problem New"
+            p['provenance'] = name
+            all_problems.append(p)
 
     # Sort/Group by section
-    problems_by_section = {s: [] for s in sections}
+    problems_by_section = {s: [] for s in SECTIONS}
     for p in all_problems:
         s = p['section']
         if s in problems_by_section:
@@ -703,47 +997,170 @@ def generate_latex(existing_problems):
             # Fallback for mismatches
             problems_by_section["Linear Algebra Fundamentals"].append(p)
 
-    for section in sections:
-        output += f"\\section{{{section}}}\n\n"
-
-        # We need to re-number problems to be consistent?
-        # The prompt uses tcolorbox auto counter "question", so we don't need manual numbering in the title.
-        # But the existing problems have "Problem 1.1" text.
-        # I will use the LaTeX environment `question` which I defined.
-        # I will put the title inside the environment argument.
-
-        for i, p in enumerate(problems_by_section[section]):
-            # Use a descriptive title if available (from new questions), else use "Problem X.Y" from existing
-            if p['source'] == 'new':
-                title = p['title']
-                q_text = p['question']
-                s_text = p['solution']
-            else:
-                title = "Practice Problem" # Or keep original numbering text if preferred?
-                # The existing 'header' is "Problem 1.1."
-                title = p['header'].strip().rstrip('.') # "Problem 1.1"
-                q_text = p['question']
-                s_text = p['solution']
-
-            output += f"\\begin{{question}}[{title}]\n"
-            output += q_text + "\n"
-            output += "\\end{question}\n\n"
-
-            output += "\\begin{solution}\n"
-            output += s_text + "\n"
-            output += "\\end{solution}\n\n"
-
-    output += "\\end{document}"
+    return problems_by_section
+
+def render_problem(p):
+    # Use a descriptive title if available (from new questions), else use "Problem X.Y" from existing
+    if p['source'] == 'new':
+        title = p['title']
+    else:
+        # The existing 'header' is "Problem 1.1."
+        title = p['header'].strip().rstrip('.') # "Problem 1.1"
+
+    output = ""
+    # Record where the problem came from ("file:line" or the authored list)
+    if p.get('provenance'):
+        output += f"% source: {p['provenance']}\n"
+
+    output += f"\\begin{{question}}[{title}]\n"
+    output += p['question'] + "\n"
+    output += "\\end{question}\n\n"
+
+    output += "\\begin{solution}\n"
+    output += p['solution'] + "\n"
+    output += "\\end{solution}\n\n"
     return output
 
-def main():
-    existing_problems = parse_existing_questions('existing_questions.txt')
-    latex_content = generate_latex(existing_problems)
+def render_section(section):
+    return f"\\section{{{section}}}\n\n"
 
-    with open('MFML_Practice_Questions_Updated.tex', 'w', encoding='utf-8') as f:
-        f.write(latex_content)
+def generate_latex(existing_problems):
+    # In-memory form of write_latex for callers holding a parsed problem list
+    problems_by_section = group_problems(existing_problems)
+    output = io.StringIO()
+    write_latex((p for section in SECTIONS for p in problems_by_section[section]), output)
+    return output.getvalue()
+
+# Position of each section in the document; unknown sections fall back to
+# Linear Algebra Fundamentals like group_problems does.
+SECTION_ORDER = {s: i for i, s in enumerate(SECTIONS)}
+
+def section_index(section):
+    return SECTION_ORDER.get(section, 0)
+
+def problem_number(p):
+    # "Problem 1.10." -> (1, 10); authored problems sort after numbered ones
+    if p['source'] == 'new':
+        return (float('inf'),)
+    return tuple(int(n) for n in p['header'].split()[1].rstrip('.').split('.'))
+
+# Keys available to order problems within a section, after the section itself
+MERGE_KEYS = {
+    'source': lambda p: p['rank'],
+    'number': problem_number,
+}
+
+def parse_merge_keys(value):
+    keys = [key.strip() for key in value.split(',')]
+    unknown = [key for key in keys if key not in MERGE_KEYS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown merge key(s): {', '.join(unknown)}")
+    return keys
+
+def iter_authored():
+    # The problems written for lectures 1-16
+    for name, questions in AUTHORED_QUESTIONS.items():
+        for p in questions:
+            yield dict(p, source='new', header="Problem New", provenance=name)
+
+# Problems sorted in memory per source before a run is spilled to disk
+RUN_SIZE = 256
+
+def _read_run(f):
+    with f:
+        for line in f:
+            yield json.loads(line)
+
+def _spill(problems):
+    f = tempfile.TemporaryFile('w+', encoding='utf-8')
+    for p in problems:
+        f.write(json.dumps(p) + "\n")
+    f.seek(0)
+    return _read_run(f)
+
+def _sorted_runs(problems, rank, key):
+    # Cuts a source into runs of at most RUN_SIZE problems sorted by `key`.
+    # Full runs are spilled to temporary files, so a source in any order
+    # merges without the whole of it sitting in memory.
+    runs, run = [], []
+    for seq, p in enumerate(problems):
+        p.setdefault('source', 'existing')
+        p['rank'], p['seq'] = rank, seq
+        run.append(p)
+        if len(run) == RUN_SIZE:
+            runs.append(_spill(sorted(run, key=key)))
+            run = []
+    runs.append(iter(sorted(run, key=key)))
+    return runs
+
+def merge_sources(filenames, keys=('source',), authored=True, budget=None):
+    # k-way merge of several extracted sources (plus the authored problems)
+    # ordered by section and then `keys`; ties keep source and file order.
+    # Sources need not be sorted: each is cut into sorted runs and all runs
+    # are merged, holding at most RUN_SIZE problems per source in memory.
+    def key(p):
+        return ((section_index(p['section']),) + tuple(MERGE_KEYS[k](p) for k in keys)
+                + (p['rank'], p['seq']))
+
+    sources = [iter_problems(filename, budget) for filename in filenames]
+    if authored:
+        sources.append(iter_authored())
+    runs = [run for rank, problems in enumerate(sources)
+            for run in _sorted_runs(problems, rank, key)]
+    yield from heapq.merge(*runs, key=key)
+
+def write_latex(problems, out):
+    # Streaming counterpart of generate_latex. `problems` must arrive in
+    # section order, as merge_sources yields them.
+    out.write(PREAMBLE)
+    current = -1
+    for p in problems:
+        while current < section_index(p['section']):
+            current += 1
+            out.write(render_section(SECTIONS[current]))
+        # The tcolorbox auto counter numbers questions, so the title only goes
+        # inside the environment argument of `question`.
+        out.write(render_problem(p))
+
+    # Sections without problems still get a heading
+    for section in SECTIONS[current + 1:]:
+        out.write(render_section(section))
+    out.write("\\end{document}")
 
-    print("Successfully generated MFML_Practice_Questions_Updated.tex")
+def main():
+    parser = argparse.ArgumentParser(description="Generate the MFML practice question LaTeX document.")
+    parser.add_argument('sources', nargs='*', default=['existing_questions.txt'],
+                        help="Extracted problem files in the 'Problem X.Y.' format")
+    parser.add_argument('-o', '--output', default='MFML_Practice_Questions_Updated.tex')
+    parser.add_argument('--order-by', type=parse_merge_keys, default='source',
+                        help="Comma-separated keys ordering problems within a section "
+                             f"({', '.join(sorted(MERGE_KEYS))})")
+    parser.add_argument('--no-authored', action='store_true',
+                        help="Leave out the problems authored in this module")
+    parser.add_argument('--budget', type=float, default=None,
+                        help="Time budget in seconds for cleaning each problem (question and solution)")
+    args = parser.parse_args()
+
+    problems = merge_sources(args.sources, args.order_by, not args.no_authored, args.budget)
+    # Render next to the output and swap it in only once the merge succeeded,
+    # so a failing source never leaves a half-written document behind.
+    fd, tmp = tempfile.mkstemp(suffix='.tex', dir=os.path.dirname(os.path.abspath(args.output)))
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            write_latex(problems, f)
+        # mkstemp creates the file private; give it the usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, args.output)
+    except RuleTimeout as e:
+        os.unlink(tmp)
+        sys.exit(f"error: {e}")
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    print(f"Successfully generated {args.output}")
 
 if __name__ == "__main__":
     main()
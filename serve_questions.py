@@ -0,0 +1,258 @@
+import argparse
+import hashlib
+import json
+import re
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from generate_latex import (
+    PREAMBLE,
+    SECTIONS,
+    group_problems,
+    parse_existing_questions,
+    render_problem,
+    render_section,
+)
+
+# Long-lived local service for the question bank.
+# The bank is parsed once at startup; rendered question/solution fragments
+# are kept in an LRU cache and documents are assembled from them on demand.
+#
+#   GET /sections                      -> section names (JSON)
+#   GET /problems?section=..&q=..      -> matching problems (JSON)
+#   GET /problems/<id>[.json|.tex]     -> one problem
+#   GET /document?section=..&q=..&id=..-> full LaTeX document
+#
+# Every response carries an ETag; a matching If-None-Match returns 304.
+# Encoded responses and their ETags are cached per normalised request, so
+# a repeated or conditional request does no rendering or hashing.
+
+FRAGMENT_CACHE_SIZE = 1024
+RESPONSE_CACHE_SIZE = 256
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def problem_id(p):
+    # Existing problems keep their number ("Problem 1.1." -> "1.1"),
+    # authored problems are addressed by a slug of their title.
+    if p['source'] == 'new':
+        return slugify(p['title'])
+    return p['header'].split()[1].rstrip('.')
+
+
+class QuestionBank:
+    def __init__(self, filename, cache_size=FRAGMENT_CACHE_SIZE, response_cache_size=RESPONSE_CACHE_SIZE):
+        problems_by_section = group_problems(parse_existing_questions(filename))
+
+        self.problems = {}
+        self.by_section = {}
+        for section in SECTIONS:
+            ids = []
+            for p in problems_by_section[section]:
+                pid = problem_id(p)
+                # Extracted files occasionally repeat a number; keep both.
+                if pid in self.problems:
+                    pid = f"{pid}-{len(self.problems)}"
+                p['id'] = pid
+                self.problems[pid] = p
+                ids.append(pid)
+            self.by_section[section] = ids
+
+        self.fragment = lru_cache(maxsize=cache_size)(self._render_fragment)
+        self._response = lru_cache(maxsize=response_cache_size)(self._render_response)
+
+    def _render_fragment(self, pid):
+        return render_problem(self.problems[pid])
+
+    def response(self, kind, sections=(), query=None, ids=()):
+        # Normalise the request so equivalent queries share one cache entry
+        query = query.lower() if query else None
+        return self._response(kind, tuple(sorted(sections)), query, tuple(sorted(ids)))
+
+    def _render_response(self, kind, sections, query, ids):
+        # Returns (encoded body, ETag, content type)
+        if kind == 'sections':
+            text = json.dumps([
+                {'section': s, 'count': len(self.by_section[s])} for s in SECTIONS
+            ], ensure_ascii=False)
+        elif kind == 'problems':
+            pids = self.select(sections, query, ids)
+            text = json.dumps([self.as_json(pid) for pid in pids], ensure_ascii=False)
+        elif kind == 'problem.json':
+            text = json.dumps(self.as_json(ids[0]), ensure_ascii=False)
+        elif kind == 'problem.tex':
+            text = self.fragment(ids[0])
+        elif kind == 'document':
+            text = self.document(self.select(sections, query, ids))
+        else:
+            raise ValueError(f"unknown response kind {kind!r}")
+
+        body = text.encode('utf-8')
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        content_type = 'application/x-latex' if kind.endswith(('tex', 'document')) else 'application/json'
+        return body, etag, content_type
+
+    def select(self, sections=None, query=None, ids=None):
+        # Returns ids in document order, filtered by section, substring query and id.
+        query = query.lower() if query else None
+        ids = set(ids) if ids else None
+        selected = []
+        for section in SECTIONS:
+            if sections and section not in sections:
+                continue
+            for pid in self.by_section[section]:
+                if ids and pid not in ids:
+                    continue
+                if query:
+                    p = self.problems[pid]
+                    haystack = (p.get('title', p['header']) + p['question'] + p['solution']).lower()
+                    if query not in haystack:
+                        continue
+                selected.append(pid)
+        return selected
+
+    def as_json(self, pid):
+        p = self.problems[pid]
+        return {
+            'id': pid,
+            'section': p['section'],
+            'title': p.get('title', p['header'].strip().rstrip('.')),
+            'question': p['question'],
+            'solution': p['solution'],
+            'provenance': p.get('provenance'),
+        }
+
+    def document(self, pids):
+        # Sections are emitted only when they contain a selected problem,
+        # unless the whole bank is requested (matching generate_latex output).
+        wanted = set(pids)
+        everything = len(wanted) == len(self.problems)
+        parts = [PREAMBLE]
+        for section in SECTIONS:
+            ids = [pid for pid in self.by_section[section] if pid in wanted]
+            if not ids and not everything:
+                continue
+            parts.append(render_section(section))
+            parts.extend(self.fragment(pid) for pid in ids)
+        parts.append("\\end{document}")
+        return "".join(parts)
+
+
+def resolve_sections(values):
+    # Accept full section names or their 1-based number; None if any is unknown.
+    sections = set()
+    for value in values:
+        if value.isdigit() and 1 <= int(value) <= len(SECTIONS):
+            sections.add(SECTIONS[int(value) - 1])
+        elif value in SECTIONS:
+            sections.add(value)
+        else:
+            return None
+    return sections
+
+
+class QuestionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls.
+    disable_nagle_algorithm = True
+    bank = None
+    verbose = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        path = url.path.rstrip('/')
+
+        if path == '/sections':
+            return self.send_cached(self.bank.response('sections'))
+
+        sections = resolve_sections(params.get('section', []))
+        if sections is None:
+            return self.send_error(404, "Unknown section")
+        query = params.get('q', [None])[0]
+        ids = set(params.get('id', []))
+
+        if path == '/problems':
+            return self.send_cached(self.bank.response('problems', sections, query, ids))
+
+        if path.startswith('/problems/'):
+            # Numeric ids contain a dot themselves ("1.1", "1.1.tex").
+            pid, fmt = path[len('/problems/'):], 'json'
+            for ext in ('.json', '.tex'):
+                if pid.endswith(ext):
+                    pid, fmt = pid[:-len(ext)], ext[1:]
+            if pid not in self.bank.problems:
+                return self.send_error(404, "Unknown problem")
+            return self.send_cached(self.bank.response(f'problem.{fmt}', ids=(pid,)))
+
+        if path == '/document':
+            return self.send_cached(self.bank.response('document', sections, query, ids))
+
+        self.send_error(404)
+
+    def not_modified(self, etag):
+        # If-None-Match holds '*' or a comma-separated list of (possibly weak) tags
+        header = self.headers.get('If-None-Match')
+        if not header:
+            return False
+        for tag in header.split(','):
+            tag = tag.strip()
+            if tag == '*' or tag.removeprefix('W/') == etag:
+                return True
+        return False
+
+    def send_cached(self, response):
+        body, etag, content_type = response
+        if self.not_modified(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+class QuestionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Allow bursts of hundreds of concurrent connections.
+    request_queue_size = 512
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the practice question bank over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--source', default='existing_questions.txt')
+    parser.add_argument('--cache-size', type=int, default=FRAGMENT_CACHE_SIZE)
+    parser.add_argument('--response-cache-size', type=int, default=RESPONSE_CACHE_SIZE)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    QuestionHandler.bank = QuestionBank(args.source, args.cache_size, args.response_cache_size)
+    QuestionHandler.verbose = args.verbose
+
+    server = QuestionServer((args.host, args.port), QuestionHandler)
+    print(f"Serving {len(QuestionHandler.bank.problems)} problems on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()